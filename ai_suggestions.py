@@ -0,0 +1,148 @@
+import collections
+import concurrent.futures
+import queue
+import threading
+import time
+
+import metrics
+
+# AI room suggestions for app.py, kept out of the Streamlit script so they can be used
+# (and exercised with a stub client) without a browser session or network access.
+
+MODEL = "gpt-4.1-mini"
+# Upper bound for the HTTP request itself; the page-level budget (suggest_with_budget) is much shorter
+UPSTREAM_TIMEOUT_SECONDS = 30
+
+
+def suggestion_key(free_rooms):
+    # The same free rooms in any order (or with repeats) ask the model the same question
+    return tuple(sorted(set(free_rooms)))
+
+
+def build_prompt(free_rooms):
+    return f"Suggest the best classroom from this list based on availability: {list(suggestion_key(free_rooms))}"
+
+
+def stream_ai_suggestion(client, free_rooms, model=MODEL):
+    # Yields text fragments as the model produces them
+    stream = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": build_prompt(free_rooms)}],
+        stream=True,
+        timeout=UPSTREAM_TIMEOUT_SECONDS,
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def fetch_request_reply(client, text, model=MODEL):
+    # Free-text requests the local parser (request_parser) couldn't read
+    ai_response = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": f"A user of the DTU room booking system asked: {text!r}. "
+                                               "Reply briefly with the room, date and time slot they need."}],
+        timeout=UPSTREAM_TIMEOUT_SECONDS,
+    )
+    return ai_response.choices[0].message.content
+
+
+def local_suggestion(free_rooms):
+    # Used when the model is slow or unreachable; deterministic so the page is stable across reruns
+    return f"{suggestion_key(free_rooms)[0]} is free at this time."
+
+
+_DONE = object()
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="ai-suggestion")
+
+
+@metrics.timed("llm_suggestion")
+def suggest_with_budget(client, free_rooms, budget_seconds=3.0, on_token=None, cache=None):
+    # Returns (suggestion, source) with source "cache", "ai" or "fallback", never blocking longer than
+    # budget_seconds. on_token(partial_text) is called from the caller's thread as tokens stream in.
+    # A stream that overruns the budget keeps going in the background and still fills the cache.
+    if cache is not None:
+        cached = cache.get(free_rooms)
+        if cached is not None:
+            return cached, "cache"
+
+    tokens = queue.Queue()
+
+    def worker():
+        parts = []
+        try:
+            for piece in stream_ai_suggestion(client, free_rooms):
+                parts.append(piece)
+                tokens.put(piece)
+            if cache is not None and parts:
+                cache.put(free_rooms, "".join(parts))
+        except Exception as e: # Any upstream failure just means "use the fallback"
+            tokens.put(e)
+        finally:
+            tokens.put(_DONE)
+
+    _executor.submit(worker)
+    deadline = time.monotonic() + budget_seconds
+    parts = []
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            item = tokens.get(timeout=remaining)
+        except queue.Empty:
+            break
+        if item is _DONE:
+            if parts:
+                return "".join(parts), "ai"
+            break
+        if isinstance(item, Exception):
+            break
+        parts.append(item)
+        if on_token is not None:
+            on_token("".join(parts))
+    metrics.inc("llm_fallbacks")
+    return local_suggestion(free_rooms), "fallback"
+
+
+class SuggestionCache:
+    # Bounded LRU of suggestions keyed on the free-room set; entries expire after ttl_seconds.
+    # Shared between Streamlit sessions (threads), hence the lock.
+    def __init__(self, max_size=128, ttl_seconds=600, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.entries = collections.OrderedDict()   # {key: (expires_at, suggestion)}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, free_rooms):
+        key = suggestion_key(free_rooms)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, suggestion = entry
+                if expires_at > self.clock():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    metrics.inc("suggestion_cache_hits")
+                    return suggestion
+                del self.entries[key]
+            self.misses += 1
+            metrics.inc("suggestion_cache_misses")
+            return None
+
+    def put(self, free_rooms, suggestion):
+        key = suggestion_key(free_rooms)
+        with self.lock:
+            self.entries[key] = (self.clock() + self.ttl_seconds, suggestion)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            return {"size": len(self.entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,132 @@
+import numpy as np
+
+from room_ranking import canonical_branch
+
+# Semester (or multi-year) utilization analytics over DTURoomBookingSystem.booking_columns():
+#   report = utilization_report(system.booking_columns("2025-08-04", "2025-11-23"))
+#   report["idle_rooms"], report["overbooked_branches"], report["peak"], report["professor_load"]
+# Bookings become one row per booked (room, day, slot) cell in flat NumPy arrays, and every figure is a
+# bincount over them, so the cost grows with the number of bookings, not with rooms x days x slots.
+# Weekday numbers are 0 = Monday ... 6 = Sunday.
+
+
+def _ints(column):
+    return np.asarray(column, dtype=np.int64)
+
+
+def _ratio(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=np.asarray(denominator) > 0)
+
+
+def booking_arrays(columns):
+    # {"room", "day", "slot", "professor"}: one entry per booked cell in the columns' date range.
+    # Weekly rules are expanded to their occurrences (minus skipped dates) with repeat/arange, no Python loop.
+    start_day, end_day = columns["start_day"], columns["end_day"]
+    n_rooms, n_slots = len(columns["room_ids"]), len(columns["time_slots"])
+
+    def cell_keys(room, day, slot):
+        return (day * n_rooms + room) * n_slots + slot
+
+    room, day, slot, professor = (_ints(column) for column in columns["dated"])
+    keep = (room >= 0) & (day >= start_day) & (day <= end_day)
+    parts = [(room[keep], day[keep], slot[keep], professor[keep])]
+
+    w_room, w_slot, w_professor, first, last = (_ints(column) for column in columns["weekly"])
+    # First occurrence on or after start_day, last on or before end_day
+    first = first + 7 * np.maximum(0, -(-(start_day - first) // 7))
+    last = np.minimum(last, end_day)
+    counts = np.where(last >= first, (last - first) // 7 + 1, 0)
+    rule = np.repeat(np.arange(len(counts)), counts)
+    week = np.arange(len(rule)) - np.repeat(np.cumsum(counts) - counts, counts)
+    w_day = first[rule] + 7 * week
+    s_room, s_day, s_slot = (_ints(column) for column in columns["skipped"])
+    held = ~np.isin(cell_keys(w_room[rule], w_day, w_slot[rule]), cell_keys(s_room, s_day, s_slot))
+    parts.append((w_room[rule][held], w_day[held], w_slot[rule][held], w_professor[rule][held]))
+
+    p_room, p_day, p_slot, p_professor = (_ints(column) for column in columns["partial"])
+    keep = (p_day >= start_day) & (p_day <= end_day)
+    # Two short bookings in one slot (10:00-10:30, 10:30-11:00) still occupy that slot once
+    _, first_rows = np.unique(cell_keys(p_room[keep], p_day[keep], p_slot[keep]), return_index=True)
+    parts.append(tuple(column[keep][first_rows] for column in (p_room, p_day, p_slot, p_professor)))
+
+    return {name: np.concatenate([part[i] for part in parts]) for i, name in enumerate(("room", "day", "slot", "professor"))}
+
+
+def utilization_report(columns, idle_below=0.1, top_k=10):
+    # Utilization is booked cells / available cells (rooms x days x slots) for each grouping.
+    # A branch's demand is the cells booked by its professors over the cells its own rooms offer:
+    # above 1 its classes spill into other branches' rooms.
+    bookings = booking_arrays(columns)
+    room, day, slot, professor = bookings["room"], bookings["day"], bookings["slot"], bookings["professor"]
+    room_ids, time_slots, strings = columns["room_ids"], columns["time_slots"], columns["strings"]
+    n_rooms, n_slots = len(room_ids), len(time_slots)
+    n_days = max(0, columns["end_day"] - columns["start_day"] + 1)
+    cells_per_room = n_days * n_slots
+
+    booked_per_room = np.bincount(room, minlength=n_rooms)
+    room_utilization = _ratio(booked_per_room, cells_per_room)
+
+    branch_names = [canonical_branch(branch) if branch else "Unknown" for branch in columns["branches"]]
+    branch_labels, room_branch = np.unique(np.array(branch_names, dtype=str), return_inverse=True)
+    branch_index = {name: i for i, name in enumerate(branch_labels)}
+    rooms_per_branch = np.bincount(room_branch, minlength=len(branch_labels))
+    booked_per_branch = np.bincount(room_branch[room], minlength=len(branch_labels))
+    # Branch of whoever holds each string id, -1 for students and non-professor strings
+    professor_branch = np.full(len(strings), -1, dtype=np.int64)
+    for i, value in enumerate(strings):
+        branch = columns["professor_branches"].get(value)
+        if branch is not None:
+            professor_branch[i] = branch_index.get(canonical_branch(branch), -1)
+    demand_branch = professor_branch[professor]
+    demand_branch = demand_branch[demand_branch >= 0]
+    demand_per_branch = np.bincount(demand_branch, minlength=len(branch_labels))
+    branch_utilization = _ratio(booked_per_branch, rooms_per_branch * cells_per_room)
+    branch_demand = _ratio(demand_per_branch, rooms_per_branch * cells_per_room)
+
+    days = np.arange(columns["start_day"], columns["start_day"] + n_days)
+    days_per_weekday = np.bincount((days - 1) % 7, minlength=7)
+    weekday = (day - 1) % 7
+    by_weekday_slot = np.bincount(weekday * n_slots + slot, minlength=7 * n_slots).reshape(7, n_slots)
+    weekday_slot = _ratio(by_weekday_slot, n_rooms * days_per_weekday[:, None])
+    peak_weekday, peak_slot = np.unravel_index(np.argmax(weekday_slot), weekday_slot.shape)
+
+    capacities = np.asarray(columns["capacities"], dtype=np.float64)
+    seats = capacities.sum()
+    seats_by_slot = np.bincount(slot, weights=capacities[room], minlength=n_slots)
+
+    load = np.bincount(professor, minlength=len(strings))
+    professor_ids = [i for i, value in enumerate(strings) if value in columns["professor_branches"]]
+    professor_ids = np.array(professor_ids, dtype=np.int64)
+    professor_loads = load[professor_ids]
+    busiest = professor_ids[np.argsort(-professor_loads, kind="stable")[:top_k]]
+    weeks = n_days / 7 if n_days else 1
+
+    return {
+        "days": n_days,
+        "bookings": int(len(room)),
+        "utilization": float(_ratio(len(room), n_rooms * cells_per_room)),
+        "rooms": [
+            {"room_id": room_ids[i], "branch": columns["branches"][i], "capacity": columns["capacities"][i],
+             "booked": int(booked_per_room[i]), "utilization": round(float(room_utilization[i]), 4)}
+            for i in range(n_rooms)
+        ],
+        "idle_rooms": [room_ids[i] for i in np.flatnonzero(room_utilization < idle_below)],
+        "branches": {
+            str(name): {"rooms": int(rooms_per_branch[i]), "utilization": round(float(branch_utilization[i]), 4),
+                        "demand": round(float(branch_demand[i]), 4)}
+            for i, name in enumerate(branch_labels)
+        },
+        "overbooked_branches": [str(branch_labels[i]) for i in np.argsort(-branch_demand) if branch_demand[i] > 1],
+        "weekday_slot": np.round(weekday_slot, 4).tolist(),
+        "slot_utilization": dict(zip(time_slots, np.round(_ratio(by_weekday_slot.sum(axis=0), n_rooms * n_days), 4).tolist())),
+        "peak": {"weekday": int(peak_weekday), "time_slot": time_slots[peak_slot],
+                 "utilization": round(float(weekday_slot[peak_weekday, peak_slot]), 4)},
+        "capacity_weighted": float(_ratio(seats_by_slot.sum(), seats * cells_per_room)),
+        "capacity_weighted_by_slot": dict(zip(time_slots, np.round(_ratio(seats_by_slot, seats * n_days), 4).tolist())),
+        "professor_load": [
+            {"professor_id": strings[i], "bookings": int(load[i]), "per_week": round(float(load[i]) / weeks, 2)}
+            for i in busiest
+        ],
+        "mean_professor_load": float(professor_loads.mean()) if len(professor_loads) else 0.0,
+    }
@@ -0,0 +1,339 @@
+import argparse
+import asyncio
+import datetime
+import json
+import re
+import urllib.parse
+
+import metrics
+from booking_store import SQLiteBookingStore
+from room_engine import DTURoomBookingSystem
+
+# HTTP/JSON front end for the booking engine on asyncio streams (no web framework needed).
+#   python api_server.py --port 8080 [--snapshot dtu_api.snapshot --journal dtu_api.journal]
+#   GET  /rooms/free?date=2025-08-07&time_slot=10:00-11:00[&min_capacity=60&branch=...&top_k=5]
+#   GET  /professors/free?date=2025-08-07&time_slots=14:00-15:00,15:00-16:00[&branch=...]
+#   GET  /rooms/<room_id>/schedule?date=2025-08-07
+#   GET  /professors/<professor_id>/schedule?date=2025-08-07
+#   POST /bookings          {"professor_id", "room_id", "date", "time_slot", "course_name"[, "purpose"]}
+#   POST /bookings/cancel   {"room_id", "date", "time_slot"}
+#   GET  /health
+# Every response is {"success": bool, "message": str, "result": ...}. Malformed input (bad dates, unknown
+# slots, non-string fields) gets 400 and unknown rooms/professors 404 before the engine sees it, so a successful
+# read with an empty result just means nothing matched; failed writes answer 409. The engine is only ever
+# touched from the event loop thread: identical reads arriving in the same loop iteration share one engine
+# call and one encoded body, and writes go through a single writer task in arrival order.
+
+MAX_HEADER_BYTES = 16384
+MAX_BODY_BYTES = 65536
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 409: "Conflict",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def encode(success, message, result=None):
+    return json.dumps({"success": success, "message": message, "result": result}, separators=(",", ":")).encode("utf-8")
+
+
+INTERVAL_PATTERN = re.compile(r"\d{2}:\d{2}-\d{2}:\d{2}")
+
+
+def _required(params, *names):
+    missing = [name for name in names if not params.get(name)]
+    if missing:
+        raise RequestError(400, f"Missing parameter(s): {', '.join(missing)}.")
+    wrong = [name for name in names if not isinstance(params[name], str)]
+    if wrong:
+        raise RequestError(400, f"Parameter(s) must be strings: {', '.join(wrong)}.")
+    return [params[name] for name in names]
+
+
+def _optional_str(params, name, default=None):
+    value = params.get(name)
+    if value in (None, ""):
+        return default
+    if not isinstance(value, str):
+        raise RequestError(400, f"{name} must be a string.")
+    return value
+
+
+def _optional_int(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise RequestError(400, f"{name} must be an integer.")
+    if value < 0:
+        raise RequestError(400, f"{name} must not be negative.")
+    return value
+
+
+def _date(date_str):
+    try:
+        datetime.date.fromisoformat(date_str)
+    except ValueError:
+        raise RequestError(400, "Invalid date format. Please use YYYY-MM-DD.")
+    return date_str
+
+
+class BookingServer:
+    def __init__(self, system, host="127.0.0.1", port=8080):
+        self.system = system
+        self.host = host
+        self.port = port
+        self.server = None
+        self.pending_reads = {}     # {read key: future of the encoded body}
+        self.writes = None          # asyncio.Queue of (callable, future), drained by writer_task
+        self.writer_task = None
+
+    async def start(self):
+        self.writes = asyncio.Queue()
+        self.writer_task = asyncio.create_task(self._writer())
+        self.server = await asyncio.start_server(self._handle_client, self.host, self.port, limit=MAX_HEADER_BYTES)
+        self.port = self.server.sockets[0].getsockname()[1]     # Resolves port=0 to the one picked
+        return self
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.writer_task is not None:
+            self.writer_task.cancel()
+            try:
+                await self.writer_task
+            except asyncio.CancelledError:
+                pass
+
+    # --- Reads and writes ---
+    def read(self, key, call):
+        # Future of the encoded response for call(); concurrent requests with the same key share it.
+        # The call runs on the next loop iteration, so requests already waiting to be parsed can join.
+        future = self.pending_reads.get(key)
+        if future is not None:
+            metrics.inc("api_reads_coalesced")
+            return future
+        future = self.pending_reads[key] = asyncio.get_running_loop().create_future()
+        asyncio.get_running_loop().call_soon(self._run_read, key, call, future)
+        return future
+
+    def _run_read(self, key, call, future):
+        del self.pending_reads[key]
+        try:
+            with metrics.timer("api_read"):
+                result, message = call()
+            future.set_result((200, encode(True, message, result)))
+        except Exception as error:
+            future.set_exception(error)
+
+    def write(self, call):
+        # Future of the encoded response for call(), which returns the engine's (success, message)
+        future = asyncio.get_running_loop().create_future()
+        self.writes.put_nowait((call, future))
+        return future
+
+    async def _writer(self):
+        while True:
+            call, future = await self.writes.get()
+            if future.cancelled():
+                continue
+            try:
+                with metrics.timer("api_write"):
+                    success, message = call()
+                future.set_result((200 if success else 409, encode(success, message)))
+            except Exception as error:
+                future.set_exception(error)
+
+    # --- Validation ---
+    def _time_slot(self, time_slot, intervals=False):
+        # One of the engine's slots, or with intervals=True also an "HH:MM-HH:MM" interval booking's times
+        if time_slot in self.system.time_slots or (intervals and INTERVAL_PATTERN.fullmatch(time_slot)):
+            return time_slot
+        raise RequestError(400, f"Invalid time slot {time_slot!r}.")
+
+    def _room(self, room_id):
+        if room_id not in self.system.rooms:
+            raise RequestError(404, f"Room {room_id} not found.")
+        return room_id
+
+    def _professor(self, professor_id):
+        if professor_id not in self.system.professors:
+            raise RequestError(404, f"Professor {professor_id} not found.")
+        return professor_id
+
+    # --- Routing ---
+    def route(self, method, path, params, body):
+        # Returns a future of (status, encoded body); raises RequestError for bad requests
+        system = self.system
+        parts = [urllib.parse.unquote(part) for part in path.strip("/").split("/")]
+        if method == "GET":
+            if parts == ["health"]:
+                return self.read(("health",), lambda: ({"rooms": len(system.rooms)}, "OK"))
+            if parts == ["rooms", "free"]:
+                date_str, time_slot = _required(params, "date", "time_slot")
+                date_str, time_slot = _date(date_str), self._time_slot(time_slot)
+                min_capacity = _optional_int(params, "min_capacity")
+                top_k = _optional_int(params, "top_k")
+                branch = _optional_str(params, "branch")
+                return self.read(
+                    ("rooms_free", date_str, time_slot, min_capacity, branch, top_k),
+                    lambda: system.find_rooms_with_filters(date_str, time_slot, min_capacity, branch, top_k),
+                )
+            if parts == ["professors", "free"]:
+                date_str, time_slots = _required(params, "date", "time_slots")
+                date_str = _date(date_str)
+                time_slots = tuple(self._time_slot(t.strip()) for t in time_slots.split(",") if t.strip())
+                if not time_slots:
+                    raise RequestError(400, "Missing parameter(s): time_slots.")
+                branch = _optional_str(params, "branch")
+                return self.read(("professors_free", date_str, time_slots, branch),
+                                 lambda: system.find_free_professors(date_str, list(time_slots), branch))
+            if len(parts) == 3 and parts[0] == "rooms" and parts[2] == "schedule":
+                room_id = self._room(parts[1])
+                date_str = _date(_required(params, "date")[0])
+                return self.read(("room_schedule", room_id, date_str), lambda: system.get_room_schedule(room_id, date_str))
+            if len(parts) == 3 and parts[0] == "professors" and parts[2] == "schedule":
+                professor_id = self._professor(parts[1])
+                date_str = _date(_required(params, "date")[0])
+                return self.read(("professor_schedule", professor_id, date_str),
+                                 lambda: system.get_professor_schedule(professor_id, date_str))
+        elif method == "POST":
+            if parts == ["bookings"]:
+                request = self._json(body)
+                professor_id, room_id, date_str, time_slot, course_name = _required(
+                    request, "professor_id", "room_id", "date", "time_slot", "course_name")
+                professor_id, room_id = self._professor(professor_id), self._room(room_id)
+                date_str, time_slot = _date(date_str), self._time_slot(time_slot)
+                purpose = _optional_str(request, "purpose", "class")
+                return self.write(lambda: system.book_room_for_professor(
+                    professor_id, room_id, date_str, time_slot, course_name, purpose))
+            if parts == ["bookings", "cancel"]:
+                room_id, date_str, time_slot = _required(self._json(body), "room_id", "date", "time_slot")
+                room_id, date_str = self._room(room_id), _date(date_str)
+                time_slot = self._time_slot(time_slot, intervals=True)
+                return self.write(lambda: system.cancel_booking(room_id, date_str, time_slot))
+        known = {("health",), ("rooms", "free"), ("professors", "free"), ("bookings",), ("bookings", "cancel")}
+        if tuple(parts) in known or (len(parts) == 3 and parts[2] == "schedule"):
+            raise RequestError(405, f"{method} is not allowed on /{'/'.join(parts)}.")
+        raise RequestError(404, f"No endpoint at {path}.")
+
+    @staticmethod
+    def _json(body):
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            raise RequestError(400, "Body must be JSON.")
+        if not isinstance(request, dict):
+            raise RequestError(400, "Body must be a JSON object.")
+        return request
+
+    # --- HTTP/1.1 ---
+    async def _handle_client(self, reader, writer):
+        # Keep-alive connections; pipelined requests are answered in order
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 413, encode(False, "Request headers too large."), False)
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, encode(False, "Malformed request line."), False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              if version == "HTTP/1.1" else headers.get("connection", "").lower() == "keep-alive")
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_BYTES:
+                    await self._respond(writer, 413 if length > 0 else 400, encode(False, "Bad Content-Length."), False)
+                    break
+                try:
+                    body = await reader.readexactly(length) if length else b""
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                url = urllib.parse.urlsplit(target)
+                params = dict(urllib.parse.parse_qsl(url.query))
+                metrics.inc("api_requests")
+                try:
+                    status, payload = await self.route(method, url.path, params, body)
+                except RequestError as error:
+                    status, payload = error.status, encode(False, str(error))
+                except Exception as error:
+                    status, payload = 500, encode(False, f"Internal error: {error}")
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            .encode("latin-1") + payload
+        )
+        await writer.drain()
+
+
+async def serve(system, host="127.0.0.1", port=8080):
+    server = await BookingServer(system, host, port).start()
+    print(f"Serving the booking API on http://{server.host}:{server.port}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the DTU room booking engine over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    # The store, snapshot and journal are all the server's own. An engine caches each date it has read from
+    # the store and never sees another process's writes, so two engines must not share a store (the CLI's is
+    # dtu_bookings.db); the journal's lock also refuses a second server on the same files
+    parser.add_argument("--store", default="dtu_api.db")
+    parser.add_argument("--snapshot", default="dtu_api.snapshot")
+    parser.add_argument("--journal", default="dtu_api.journal")
+    args = parser.parse_args()
+    try:
+        system = DTURoomBookingSystem.from_snapshot(
+            args.snapshot, store=SQLiteBookingStore(args.store), journal_path=args.journal
+        )
+    except OSError as error:
+        parser.exit(1, f"Can't open the journal: {error}\n")
+    try:
+        asyncio.run(serve(system, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if system.journal is not None:
+            system.journal.close()
+        system.store.close()
+
+
+if __name__ == "__main__":
+    main()
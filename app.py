@@ -1,27 +1,51 @@
 import streamlit as st
-import sqlite3
+import datetime
+import html
 import os
+import time
 from dotenv import load_dotenv
 from openai import OpenAI
 
-# Load API Key
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-# DB Setup
-conn = sqlite3.connect("room_bookings.db", check_same_thread=False)
-c = conn.cursor()
-c.execute("""
-CREATE TABLE IF NOT EXISTS bookings(
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT,
-    role TEXT,
-    room TEXT,
-    date TEXT,
-    timeslot TEXT
-)
-""")
-conn.commit()
+import metrics
+from ai_suggestions import SuggestionCache, suggest_with_budget
+from booking_db import ConnectionPool, HeatmapCache, book_room, booked_rooms, day_bookings
+from room_engine import DTURoomBookingSystem
+from room_ranking import explain_choice, rank_rooms
+
+page_started = time.perf_counter()
+
+# Load API Key. Everything below that is expensive to set up is built once per server process with
+# st.cache_resource and reused by every rerun and session.
+@st.cache_resource
+def get_openai_client():
+    load_dotenv()
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+client = get_openai_client()
+
+# Longest the page waits on the model before showing the local suggestion
+AI_BUDGET_SECONDS = 3.0
+
+# One suggestion cache per server process, shared by every session and rerun
+@st.cache_resource
+def get_suggestion_cache():
+    return SuggestionCache(max_size=256, ttl_seconds=600)
+
+suggestion_cache = get_suggestion_cache()
+
+# DB Setup: a pool of WAL-mode connections per server process, shared by every session
+@st.cache_resource
+def get_db_pool():
+    return ConnectionPool("room_bookings.db", size=8)
+
+db_pool = get_db_pool()
+
+# Free-room counts per date range; entries go stale as soon as a booking is made through db_pool
+@st.cache_resource
+def get_heatmap_cache():
+    return HeatmapCache(max_ranges=32)
+
+heatmap_cache = get_heatmap_cache()
 
 # Room list from your timetable PDF
 ROOMS = [
@@ -29,42 +53,130 @@ ROOMS = [
     "PB-GF1","PB-GF2","PB-GF3","PB-GF4","PB-GF5","PB-GF6",
     "SPS5","SPS6","SPS7","SPS8","CS LAB","DBMS LAB","ML LAB","WATER LAB"
 ]
+TIMESLOTS = ["8-9","9-10","10-11","11-12","12-1","1-2","2-3","3-4","4-5","5-6"]
+# The engine's id for each room above. The engine also has unspaced "SPS5"/"SPS8" rooms from other
+# branches' timetables, which are different rooms; None marks labs that aren't in the timetable
+ENGINE_ROOM_IDS = {room_id: room_id for room_id in ROOMS if room_id.startswith("PB-")}
+ENGINE_ROOM_IDS.update({"SPS5": "SPS 5", "SPS6": "SPS 6", "SPS7": "SPS 7", "SPS8": "SPS 8"})
+ENGINE_ROOM_IDS.update({"CS LAB": None, "DBMS LAB": None, "ML LAB": None, "WATER LAB": None})
+
+@st.cache_resource
+def get_engine():
+    # Loaded from a prebuilt snapshot when one matches the current timetable data
+    return DTURoomBookingSystem.from_snapshot("dtu_engine.snapshot")
+
+@st.cache_resource
+def get_room_details():
+    # Branch/capacity for each room from the engine's timetable data, looked up through ENGINE_ROOM_IDS;
+    # labs that aren't in the timetable get the engine's Room defaults. A room missing from either is an
+    # error rather than a guess
+    engine = get_engine()
+    details = {}
+    for room_id in ROOMS:
+        if room_id not in ENGINE_ROOM_IDS:
+            raise KeyError(f"Room {room_id} has no entry in ENGINE_ROOM_IDS.")
+        engine_room_id = ENGINE_ROOM_IDS[room_id]
+        if engine_room_id is not None and engine_room_id not in engine.rooms:
+            raise KeyError(f"Room {room_id} maps to {engine_room_id}, which the engine doesn't have.")
+        room = engine.rooms[engine_room_id] if engine_room_id is not None else None
+        if room:
+            details[room_id] = {"room_id": room_id, "branch": room.branch, "capacity": room.capacity}
+        else:
+            details[room_id] = {"room_id": room_id, "branch": "General", "capacity": 30}
+    return details
+
+room_details = get_room_details()
 
 st.title("🎓 AI Room Booking System")
 
 name = st.text_input("Enter Name")
 role = st.selectbox("Role", ["Professor", "Student"])
 date = st.date_input("Select Date")
-timeslot = st.selectbox("Select Time Slot", 
-            ["8-9","9-10","10-11","11-12","12-1","1-2","2-3","3-4","4-5","5-6"])
+timeslot = st.selectbox("Select Time Slot", TIMESLOTS)
+class_size = st.number_input("Expected class size", min_value=1, value=30)
+branch = st.selectbox("Department", ["Any"] + sorted({r["branch"] for r in room_details.values()}))
+explain_with_ai = st.checkbox("🤖 Add an AI explanation", value=False)
 
+# Remember the checked slot in the session, otherwise clicking "Confirm Booking" reruns the
+# script with "Check Available Rooms" unpressed and the booking never happens
 if st.button("Check Available Rooms"):
+    st.session_state["checked_slot"] = (str(date), timeslot)
 
-    c.execute("SELECT room FROM bookings WHERE date=? AND timeslot=?", (str(date), timeslot))
-    booked_rooms = [r[0] for r in c.fetchall()]
+if st.session_state.get("checked_slot") == (str(date), timeslot):
 
-    free_rooms = [room for room in ROOMS if room not in booked_rooms]
+    taken = set(booked_rooms(db_pool, str(date), timeslot))
+
+    free_rooms = [room for room in ROOMS if room not in taken]
 
     if not free_rooms:
         st.error("❌ No rooms available at this time!")
     else:
         st.success(f"✅ Available Rooms: {', '.join(free_rooms)}")
 
-        # AI Suggestion
-        prompt = f"Suggest the best classroom from this list based on availability: {free_rooms}"
-
-        ai_response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[{"role": "user", "content": prompt}]
+        # Local ranking: capacity fit, department, and how much the booking would split the room's day
+        day_busy = {}
+        for booked_room, booked_slot in day_bookings(db_pool, str(date)):
+            if booked_slot in TIMESLOTS:
+                day_busy[booked_room] = day_busy.get(booked_room, 0) | (1 << TIMESLOTS.index(booked_slot))
+        ranked = rank_rooms(
+            [room_details[room] for room in free_rooms], class_size,
+            None if branch == "Any" else branch, day_busy,
+            TIMESLOTS.index(timeslot), len(TIMESLOTS), top_k=None
         )
-
-        st.info("🤖 AI Suggestion: " + ai_response.choices[0].message.content)
+        if ranked:
+            best_room = ranked[0][1]
+            st.info("🏆 Best fit: " + explain_choice(best_room, class_size, None if branch == "Any" else branch))
+            ranked_ids = [room["room_id"] for score, room in ranked]
+            free_rooms = ranked_ids + [room for room in free_rooms if room not in ranked_ids]
+        else:
+            st.warning(f"No free room seats {class_size}; showing every free room.")
+        suggestion_box = st.empty()
 
         selected_room = st.selectbox("Select Room to Book", free_rooms)
 
         if st.button("Confirm Booking"):
-            c.execute("INSERT INTO bookings(name, role, room, date, timeslot) VALUES(?,?,?,?,?)",
-                      (name, role, selected_room, str(date), timeslot))
-            conn.commit()
-            st.balloons()
-            st.success(f"🎉 Room {selected_room} successfully booked!")
+            success, message = book_room(db_pool, name, role, selected_room, str(date), timeslot)
+            if success:
+                st.balloons()
+                st.success("🎉 " + message)
+            else:
+                st.error("❌ " + message)
+
+        # Optional AI Suggestion, filled in last so the room list and booking controls never wait on the model.
+        # Cached per free-room set; tokens are streamed into the box and a local pick is shown if the budget runs out.
+        if explain_with_ai:
+            suggestion_box.info("🤖 AI Suggestion: thinking…")
+            suggestion, source = suggest_with_budget(
+                client, free_rooms, budget_seconds=AI_BUDGET_SECONDS, cache=suggestion_cache,
+                on_token=lambda partial: suggestion_box.info("🤖 AI Suggestion: " + partial)
+            )
+            if source == "fallback":
+                suggestion_box.info("💡 Suggestion (AI unavailable): " + suggestion)
+            else:
+                suggestion_box.info("🤖 AI Suggestion: " + suggestion)
+
+# Heatmap of free rooms for every slot over a date range, so gaps are visible without checking slot by slot
+with st.expander("📅 Free rooms heatmap"):
+    heatmap_range = st.date_input("Dates", value=(date, date + datetime.timedelta(days=6)), key="heatmap_range")
+    if isinstance(heatmap_range, (tuple, list)) and len(heatmap_range) == 2:
+        start_date, end_date = heatmap_range
+        if (end_date - start_date).days > 120:
+            st.warning("Showing the first 120 days of the range.")
+            end_date = start_date + datetime.timedelta(days=120)
+        grid = heatmap_cache.get(db_pool, str(start_date), str(end_date), ROOMS, TIMESLOTS)
+        cells = ["<table><tr><th>Date</th>" + "".join(f"<th>{slot}</th>" for slot in TIMESLOTS) + "</tr>"]
+        for day, free_counts in grid:
+            # Green when every room is free, fading to red as the slot fills up
+            cells.append(f"<tr><td>{html.escape(day)}</td>" + "".join(
+                f'<td style="background:hsl({120 * free // len(ROOMS)},70%,80%);text-align:center">{free}</td>'
+                for free in free_counts
+            ) + "</tr>")
+        cells.append("</table>")
+        st.markdown("".join(cells), unsafe_allow_html=True)
+        st.caption(f"Free rooms out of {len(ROOMS)} per slot.")
+
+# Page latency (the llm_suggestion span above shows how much of it is the model)
+metrics.observe("app_page", time.perf_counter() - page_started)
+if metrics.enabled:
+    with st.sidebar.expander("📈 Metrics"):
+        st.code(metrics.render_prometheus(), language="text")
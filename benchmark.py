@@ -0,0 +1,153 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from room_engine import DTURoomBookingSystem, dtu_room_booking
+
+# Benchmarks the booking engine on seeded synthetic campuses.
+#   python benchmark.py                                  # default scales, table on stdout
+#   python benchmark.py --scales 100x300,2000x6000 --json bench.json
+# Each scale is ROOMSxPROFESSORS. Results (throughput, p50/p99 per operation) can be written as JSON
+# so runs can be compared for regressions.
+
+BRANCHES = [
+    "Computer Science & Engineering", "Electronics & Communication Engineering", "Electrical Engineering",
+    "Mechanical Engineering", "Civil Engineering", "Mathematics & Computing", "Engineering Physics",
+    "Chemical Engineering", "Bio-Technology", "Software Engineering",
+]
+CAPACITIES = [30, 40, 50, 60, 80, 120]
+DEFAULT_SCALES = "100x300,1000x3000,4000x12000"
+
+
+def build_campus(n_rooms, n_professors, seed=0, classes_per_professor=6, adhoc_per_room=20):
+    # n_rooms rooms and n_professors professors, each professor teaching classes_per_professor weekly
+    # classes over the semester, plus adhoc_per_room random dated bookings per room
+    rng = random.Random(seed)
+    system = DTURoomBookingSystem(load_dtu_data=False) # Without the hardcoded DTU rooms/professors/timetable
+    for i in range(n_rooms):
+        system.add_room(f"R{i:05d}", rng.choice(BRANCHES), rng.choice(CAPACITIES))
+    for i in range(n_professors):
+        system.add_professor(f"F{i:05d}", f"Faculty {i}", rng.choice(BRANCHES))
+
+    room_ids = list(system.rooms)
+    professor_ids = list(system.professors)
+    weekdays = dtu_room_booking.WEEKDAYS[:5]
+    start, end = system.semester_start_str, system.semester_end_str
+    for n, professor_id in enumerate(professor_ids):
+        for k in range(classes_per_professor):
+            system.add_weekly_booking(
+                professor_id, rng.choice(room_ids), rng.choice(weekdays), rng.choice(system.time_slots),
+                start, end, f"C{n % 500:03d}-{k}"
+            )
+
+    dates = system.get_date_range(start, end)
+    for _ in range(n_rooms * adhoc_per_room):
+        system.book_room_for_professor(
+            rng.choice(professor_ids), rng.choice(room_ids), rng.choice(dates), rng.choice(system.time_slots),
+            "Extra class", "adhoc"
+        )
+    return system, dates
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def time_operation(name, calls):
+    # calls: list of zero-argument callables, timed one by one
+    durations = []
+    for call in calls:
+        t0 = time.perf_counter_ns()
+        call()
+        durations.append(time.perf_counter_ns() - t0)
+    total = sum(durations)
+    durations.sort()
+    return {
+        "operation": name,
+        "calls": len(durations),
+        "ops_per_sec": round(len(durations) / (total / 1e9), 1) if total else None,
+        "p50_us": round(percentile(durations, 0.50) / 1000, 2),
+        "p99_us": round(percentile(durations, 0.99) / 1000, 2),
+    }
+
+
+def run_scale(n_rooms, n_professors, n_ops, seed):
+    t0 = time.perf_counter()
+    system, dates = build_campus(n_rooms, n_professors, seed)
+    build_seconds = time.perf_counter() - t0
+
+    rng = random.Random(seed + 1)
+    room_ids = list(system.rooms)
+    professor_ids = list(system.professors)
+    slots = system.time_slots
+
+    def pick():
+        return rng.choice(professor_ids), rng.choice(room_ids), rng.choice(dates), rng.choice(slots)
+
+    def calls(make):
+        return [make(*pick()) for _ in range(n_ops)]
+
+    results = [
+        time_operation("find_available_rooms_for_professor", calls(
+            lambda p, r, d, t: lambda: system.find_available_rooms_for_professor(p, d, t))),
+        time_operation("find_empty_room_for_self_study", calls(
+            lambda p, r, d, t: lambda: system.find_empty_room_for_self_study(d, t))),
+        time_operation("book_room_for_professor", calls(
+            lambda p, r, d, t: lambda: system.book_room_for_professor(p, r, d, t, "Bench", "adhoc"))),
+        time_operation("display_room_schedule", calls(
+            lambda p, r, d, t: lambda: system.display_room_schedule(r, d))),
+        time_operation("display_professor_schedule", calls(
+            lambda p, r, d, t: lambda: system.display_professor_schedule(p, d))),
+    ]
+    return {
+        "rooms": n_rooms,
+        "professors": n_professors,
+        "seed": seed,
+        "build_seconds": round(build_seconds, 3),
+        "results": results,
+    }
+
+
+def parse_scales(text):
+    scales = []
+    for part in text.split(","):
+        rooms, professors = part.lower().split("x")
+        scales.append((int(rooms), int(professors)))
+    return scales
+
+
+def print_report(runs):
+    for run in runs:
+        print(f"\n{run['rooms']} rooms x {run['professors']} professors (built in {run['build_seconds']}s)")
+        print(f"  {'operation':<38}{'ops/s':>12}{'p50 us':>10}{'p99 us':>10}")
+        for r in run["results"]:
+            print(f"  {r['operation']:<38}{r['ops_per_sec']:>12}{r['p50_us']:>10}{r['p99_us']:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark DTURoomBookingSystem on synthetic campuses.")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="comma-separated ROOMSxPROFESSORS")
+    parser.add_argument("--ops", type=int, default=2000, help="calls timed per operation and scale")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="write machine-readable results here")
+    args = parser.parse_args(argv)
+
+    runs = [run_scale(rooms, professors, args.ops, args.seed) for rooms, professors in parse_scales(args.scales)]
+    print_report(runs)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "ops": args.ops,
+                "runs": runs,
+            }, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import collections
+import contextlib
+import datetime
+import queue
+import sqlite3
+import threading
+
+import metrics
+
+# Database layer for app.py's bookings table. Every session checks a connection out of a small pool
+# for the duration of one operation instead of sharing one module-level cursor, and bookings are a
+# single check-and-insert transaction so two users can't take the same room/date/slot.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookings(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    role TEXT,
+    room TEXT,
+    date TEXT,
+    timeslot TEXT
+)
+"""
+
+
+def init_db(conn):
+    conn.execute(SCHEMA)
+    # One booking per room/date/slot; also covers the "booked rooms at (date, timeslot)" lookup
+    try:
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_bookings_slot ON bookings(date, timeslot, room)")
+    except sqlite3.IntegrityError:
+        # Older databases may already hold duplicates; fall back to a plain index for the lookup
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_bookings_date_slot ON bookings(date, timeslot, room)")
+
+
+class ConnectionPool:
+    def __init__(self, path, size=8, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        # Bumped on every successful booking so cached aggregates (HeatmapCache) know they are stale
+        self.version = 0
+        self.version_lock = threading.Lock()
+        self.idle = queue.LifoQueue(maxsize=size)  # LIFO keeps the warmest connections in use
+        for i in range(size):
+            conn = sqlite3.connect(path, check_same_thread=False, timeout=timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if i == 0:
+                init_db(conn)
+            self.idle.put(conn)
+
+    @contextlib.contextmanager
+    def connection(self):
+        conn = self.idle.get(timeout=self.timeout)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self.idle.put(conn)
+
+    def bump_version(self):
+        with self.version_lock:
+            self.version += 1
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().close()
+
+
+@metrics.timed("db_booked_rooms")
+def booked_rooms(pool, date_str, timeslot):
+    with pool.connection() as conn:
+        return [row[0] for row in conn.execute("SELECT room FROM bookings WHERE date=? AND timeslot=?", (date_str, timeslot))]
+
+
+@metrics.timed("db_day_bookings")
+def day_bookings(pool, date_str):
+    # [(room, timeslot)] for every booking on date_str
+    with pool.connection() as conn:
+        return conn.execute("SELECT room, timeslot FROM bookings WHERE date=?", (date_str,)).fetchall()
+
+
+@metrics.timed("db_book_room")
+def book_room(pool, name, role, room, date_str, timeslot):
+    # BEGIN IMMEDIATE takes the write lock up front, so the check and the insert see the same state.
+    # Returns (success, message) like the engine's booking calls.
+    try:
+        with pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            existing = conn.execute(
+                "SELECT name FROM bookings WHERE date=? AND timeslot=? AND room=?", (date_str, timeslot, room)
+            ).fetchone()
+            if existing:
+                conn.execute("ROLLBACK")
+                metrics.inc("booking_conflicts")
+                return False, f"Room {room} is already booked by {existing[0]} for {date_str} at {timeslot}."
+            conn.execute("INSERT INTO bookings(name, role, room, date, timeslot) VALUES(?,?,?,?,?)",
+                         (name, role, room, date_str, timeslot))
+            conn.execute("COMMIT")
+        pool.bump_version()
+    except sqlite3.IntegrityError:
+        metrics.inc("booking_conflicts")
+        return False, f"Room {room} is already booked for {date_str} at {timeslot}."
+    except (sqlite3.OperationalError, queue.Empty):
+        # Lock or pool wait ran past the timeout
+        return False, "The booking system is busy, please try again."
+    metrics.inc("bookings")
+    return True, f"Room {room} successfully booked!"
+
+
+@metrics.timed("db_slot_counts")
+def booked_counts(pool, start_date_str, end_date_str, rooms):
+    # {(date, timeslot): number of distinct rooms booked} over the date range, in one grouped query
+    placeholders = ",".join("?" * len(rooms))
+    with pool.connection() as conn:
+        rows = conn.execute(
+            f"SELECT date, timeslot, COUNT(DISTINCT room) FROM bookings WHERE date BETWEEN ? AND ? "
+            f"AND room IN ({placeholders}) GROUP BY date, timeslot",
+            (start_date_str, end_date_str, *rooms)
+        ).fetchall()
+    return {(date_str, timeslot): count for date_str, timeslot, count in rows}
+
+
+def free_room_grid(pool, start_date_str, end_date_str, rooms, timeslots):
+    # [(date, [free rooms in each of timeslots])] for every date in the inclusive range
+    counts = booked_counts(pool, start_date_str, end_date_str, rooms)
+    day = datetime.date.fromisoformat(start_date_str)
+    end = datetime.date.fromisoformat(end_date_str)
+    grid = []
+    while day <= end:
+        date_str = day.isoformat()
+        grid.append((date_str, [len(rooms) - counts.get((date_str, timeslot), 0) for timeslot in timeslots]))
+        day += datetime.timedelta(days=1)
+    return grid
+
+
+class HeatmapCache:
+    # Free-room grids per date range, shared by every session. An entry is only served while the pool's
+    # version matches the one it was computed at, so any booking made through book_room invalidates it.
+    def __init__(self, max_ranges=32):
+        self.max_ranges = max_ranges
+        self.entries = collections.OrderedDict()   # {(start, end, rooms, timeslots): (version, grid)}
+        self.lock = threading.Lock()
+
+    def get(self, pool, start_date_str, end_date_str, rooms, timeslots):
+        key = (start_date_str, end_date_str, tuple(rooms), tuple(timeslots))
+        version = pool.version
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(key)
+                metrics.inc("heatmap_cache_hits")
+                return entry[1]
+        metrics.inc("heatmap_cache_misses")
+        grid = free_room_grid(pool, start_date_str, end_date_str, rooms, timeslots)
+        with self.lock:
+            self.entries[key] = (version, grid)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_ranges:
+                self.entries.popitem(last=False)
+        return grid
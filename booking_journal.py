@@ -0,0 +1,174 @@
+import errno
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+# Append-only journal of the engine's booking mutations.
+# Each record is framed as <length, crc32, sequence number> followed by a compact JSON list:
+#   ["book", professor_id, room_id, date, time_slot, course_name, purpose]
+#   ["weekly", professor_id, room_id, weekday, time_slot, start_date, end_date, course_name, purpose, exceptions]
+#   ["skip", room_id, date, time_slot]
+#   ["interval", professor_id, room_id, date, start "HH:MM", end "HH:MM", course_name, purpose]
+#   ["student", student_id, room_id, date, time_slot, purpose]
+#   ["cancel", room_id, date, time_slot]
+#   ["cancel_interval", room_id, date, start "HH:MM", end "HH:MM"]
+# Appends go to the OS right away, so a crashed process loses nothing; fsync is batched (group commit)
+# once group_size records have piled up, and a timer syncs whatever is left sync_interval seconds after the
+# first unsynced append, so a power loss can only take the last sync_interval seconds of records.
+# A torn record at the end (crash mid-write) fails its checksum and is cut off when the journal is opened.
+# One process owns a journal at a time: an exclusive lock on path + ".lock" is held until close(), and a
+# second opener gets OSError(EBUSY) instead of interleaving its own sequence numbers into the file.
+
+FRAME = struct.Struct("<IIQ")
+
+
+def _lock(path):
+    # Returns the descriptor holding the lock; raises OSError(EBUSY) if another process has it
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd)
+        raise OSError(errno.EBUSY, "Journal is in use by another process", path)
+    return fd
+
+
+class BookingJournal:
+    def __init__(self, path, group_size=64, sync_interval=0.05, clock=time.monotonic):
+        self.path = path
+        self.lock_fd = _lock(path + ".lock")
+        self.group_size = group_size
+        self.sync_interval = sync_interval
+        self.clock = clock
+        self.last_seq = 0
+        self.records = 0
+        valid_length = 0
+        for seq, record, end in self._scan():
+            self.last_seq = seq
+            self.records += 1
+            valid_length = end
+        self.file = open(path, "ab")
+        if self.file.tell() > valid_length:
+            self.file.truncate(valid_length)
+        self.pending = 0
+        self.first_pending_at = None
+        self.lock = threading.Lock()    # The flush timer syncs from its own thread
+        self.timer = None
+
+    def __len__(self):
+        return self.records
+
+    def _scan(self):
+        # (seq, record, end offset) for every intact record, stopping at the first damaged one
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        offset = 0
+        while offset + FRAME.size <= len(data):
+            length, checksum, seq = FRAME.unpack_from(data, offset)
+            start, end = offset + FRAME.size, offset + FRAME.size + length
+            payload = data[start:end]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                return
+            yield seq, json.loads(payload), end
+            offset = end
+
+    def read(self):
+        # (seq, record) in append order
+        for seq, record, end in self._scan():
+            yield seq, record
+
+    def append(self, record):
+        payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+        with self.lock:
+            self.last_seq += 1
+            self.file.write(FRAME.pack(len(payload), zlib.crc32(payload), self.last_seq) + payload)
+            self.file.flush()
+            self.records += 1
+            self.pending += 1
+            now = self.clock()
+            if self.first_pending_at is None:
+                self.first_pending_at = now
+                if self.sync_interval > 0:
+                    self.timer = threading.Timer(self.sync_interval, self.sync)
+                    self.timer.daemon = True
+                    self.timer.start()
+            if self.pending >= self.group_size or now - self.first_pending_at >= self.sync_interval:
+                self._sync()
+            return self.last_seq
+
+    def sync(self):
+        with self.lock:
+            self._sync()
+
+    def _sync(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if self.pending and not self.file.closed:
+            os.fsync(self.file.fileno())
+            self.pending = 0
+            self.first_pending_at = None
+
+    def rewrite(self, entries):
+        # Replace the journal with entries [(seq, record), ...] (e.g. only the still-live ones), atomically
+        with self.lock:
+            self._sync()
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                for seq, record in entries:
+                    payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+                    f.write(FRAME.pack(len(payload), zlib.crc32(payload), seq) + payload)
+                f.flush()
+                os.fsync(f.fileno())
+            self.file.close()
+            os.replace(tmp_path, self.path)
+            self.file = open(self.path, "ab")
+            self.records = len(entries)
+
+    def close(self):
+        with self.lock:
+            self._sync()
+            self.file.close()
+            if self.lock_fd is not None:
+                os.close(self.lock_fd)     # Releases the lock
+                self.lock_fd = None
+
+
+def record_key(record):
+    # Records with the same key describe the same booking; the latest one wins during compaction
+    kind = record[0]
+    if kind in ("book", "student"):
+        return ("book", record[2], record[3], record[4])
+    if kind == "cancel":
+        return ("book", record[1], record[2], record[3])
+    if kind == "weekly":
+        return ("weekly", record[2], record[3], record[4], record[5], record[6])
+    if kind == "interval":
+        return ("interval", record[2], record[3], record[4])
+    if kind == "cancel_interval":
+        return ("interval", record[1], record[2], record[3])
+    return tuple(record)
+
+
+def live_entries(entries):
+    # Drop records whose effect has since been undone, keeping the survivors in their original order
+    live = {}
+    for seq, record in entries:
+        live[record_key(record)] = (seq, record)
+    # A cancellation that outlived its booking has nothing left to undo
+    return sorted((entry for entry in live.values() if entry[1][0] not in ("cancel", "cancel_interval")), key=lambda entry: entry[0])
@@ -0,0 +1,78 @@
+import sqlite3
+
+# Persistent storage for DTURoomBookingSystem's dated bookings.
+# One row per (room, date, slot); the engine writes through on every booking and
+# loads a date's rows back into memory only when a query touches that date.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS room_bookings(
+    room_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time_slot TEXT NOT NULL,
+    professor_id TEXT,
+    course_name TEXT,
+    purpose TEXT,
+    UNIQUE(room_id, date, time_slot)
+);
+-- Covers "everything on a date" and the dates in a range
+CREATE INDEX IF NOT EXISTS idx_room_bookings_date_slot
+    ON room_bookings(date, time_slot, room_id, professor_id, course_name, purpose);
+-- Covers the professor-schedule query
+CREATE INDEX IF NOT EXISTS idx_room_bookings_professor
+    ON room_bookings(professor_id, date, time_slot, room_id, course_name);
+"""
+
+# Statements are kept as constants so sqlite3's statement cache reuses the prepared versions.
+INSERT_BOOKING = ("INSERT INTO room_bookings(room_id, date, time_slot, professor_id, course_name, purpose) "
+                  "VALUES(?,?,?,?,?,?)")
+DELETE_BOOKING = "DELETE FROM room_bookings WHERE room_id=? AND date=? AND time_slot=?"
+SELECT_BOOKINGS_ON = ("SELECT room_id, time_slot, professor_id, course_name, purpose "
+                      "FROM room_bookings WHERE date=?")
+SELECT_PROFESSOR_SCHEDULE = ("SELECT time_slot, room_id, course_name FROM room_bookings "
+                             "WHERE professor_id=? AND date=?")
+SELECT_DATES_BETWEEN = "SELECT DISTINCT date FROM room_bookings WHERE date BETWEEN ? AND ?"
+
+
+class SQLiteBookingStore:
+    def __init__(self, path="dtu_bookings.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, cached_statements=64)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL") # Safe with WAL, avoids an fsync per commit
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def insert_booking(self, room_id, date_str, time_slot, booking_details):
+        # The UNIQUE constraint is the final word on double-booking a room. Professor clashes are only checked
+        # in the engine's memory, so a store must not be shared by two engines
+        try:
+            with self.conn:
+                self.conn.execute(INSERT_BOOKING, (
+                    room_id, date_str, time_slot,
+                    booking_details.get("professor_id"),
+                    booking_details.get("course_name"),
+                    booking_details.get("purpose"),
+                ))
+        except sqlite3.IntegrityError:
+            return False, f"Room {room_id} already booked for {date_str} at {time_slot}."
+        return True, f"Booking for {room_id} on {date_str} at {time_slot} saved."
+
+    def delete_booking(self, room_id, date_str, time_slot):
+        with self.conn:
+            cur = self.conn.execute(DELETE_BOOKING, (room_id, date_str, time_slot))
+        return cur.rowcount > 0
+
+    def bookings_on(self, date_str):
+        # Yields (room_id, time_slot, booking_details) for every booking on date_str
+        for room_id, time_slot, professor_id, course_name, purpose in self.conn.execute(SELECT_BOOKINGS_ON, (date_str,)):
+            yield room_id, time_slot, {"professor_id": professor_id, "course_name": course_name, "purpose": purpose}
+
+    def professor_schedule(self, professor_id, date_str):
+        # [(time_slot, room_id, course_name)] for the professor's dated bookings, straight from the covering index
+        return self.conn.execute(SELECT_PROFESSOR_SCHEDULE, (professor_id, date_str)).fetchall()
+
+    def dates_between(self, start_date_str, end_date_str):
+        return [row[0] for row in self.conn.execute(SELECT_DATES_BETWEEN, (start_date_str, end_date_str))]
+
+    def close(self):
+        self.conn.close()
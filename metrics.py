@@ -0,0 +1,142 @@
+import bisect
+import functools
+import os
+import threading
+import time
+
+# Lightweight in-process instrumentation for the engine and app.py.
+#   metrics.enable()                      # or set ROOM_METRICS=1
+#   with metrics.timer("db_query"): ...   # latency histogram per operation
+#   metrics.inc("bookings")               # counters
+#   metrics.snapshot() / metrics.render_prometheus()
+# While disabled, timer() hands back a shared no-op context and timed() wrappers call straight through,
+# so the instrumented hot paths pay for one global lookup.
+
+enabled = os.getenv("ROOM_METRICS", "") not in ("", "0")
+
+# Upper bounds in seconds, from microsecond-level index scans to multi-second LLM calls
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}    # {op: [bucket_counts..., +Inf count], sum, count}
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def inc(name, amount=1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def observe(op, seconds):
+    if not enabled:
+        return
+    i = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        histogram = _histograms.get(op)
+        if histogram is None:
+            histogram = _histograms[op] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+        histogram[0][i] += 1
+        histogram[1] += seconds
+        histogram[2] += 1
+
+
+class _Timer:
+    __slots__ = ("op", "start")
+
+    def __init__(self, op):
+        self.op = op
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.op, time.perf_counter() - self.start)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+def timer(op):
+    # Timing span: with metrics.timer("llm_suggestion"): ...
+    return _Timer(op) if enabled else _NOOP_TIMER
+
+
+def timed(op):
+    # Decorator form of timer() for functions and methods
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(op, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def snapshot():
+    # {"counters": {name: value}, "histograms": {op: {"buckets": {le: cumulative}, "sum": s, "count": n}}}
+    with _lock:
+        counters = dict(_counters)
+        histograms = {}
+        for op, (bucket_counts, total, count) in _histograms.items():
+            cumulative, running = {}, 0
+            for bound, n in zip(BUCKETS + (float("inf"),), bucket_counts):
+                running += n
+                cumulative[bound] = running
+            histograms[op] = {"buckets": cumulative, "sum": total, "count": count}
+    return {"counters": counters, "histograms": histograms}
+
+
+def render_prometheus(prefix="dtu"):
+    # Prometheus text exposition format (version 0.0.4)
+    data = snapshot()
+    lines = []
+    for name in sorted(data["counters"]):
+        metric = f"{prefix}_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {data['counters'][name]}")
+    if data["histograms"]:
+        metric = f"{prefix}_operation_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for op in sorted(data["histograms"]):
+            histogram = data["histograms"][op]
+            for bound, count in histogram["buckets"].items():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{metric}_bucket{{op="{op}",le="{le}"}} {count}')
+            lines.append(f'{metric}_sum{{op="{op}"}} {histogram["sum"]:.9f}')
+            lines.append(f'{metric}_count{{op="{op}"}} {histogram["count"]}')
+    return "\n".join(lines) + "\n"
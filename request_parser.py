@@ -0,0 +1,184 @@
+import datetime
+import functools
+import re
+
+# Local parser for short booking requests, so formulaic ones never need a round trip to the model:
+#   "free room in PB tomorrow 2-4"             -> find, rooms starting "PB", tomorrow, 14:00-16:00
+#   "book SPS 7 for AM 101 Friday 10am"        -> book SPS 7 for "AM 101", next Friday, 10:00-11:00
+#   "any empty room 2025-08-07 08:00-09:00"    -> find, 2025-08-07, 08:00-09:00
+# parse_request() returns None when it can't tell what was asked; callers then fall back to the LLM.
+
+WEEKDAY_NAMES = {
+    "monday": 0, "mon": 0, "tuesday": 1, "tue": 1, "tues": 1, "wednesday": 2, "wed": 2,
+    "thursday": 3, "thu": 3, "thurs": 3, "friday": 4, "fri": 4, "saturday": 5, "sat": 5, "sunday": 6, "sun": 6,
+}
+BOOK_WORDS = ("book", "reserve")
+
+_DATE_PATTERN = re.compile(
+    r"\b(?P<iso>\d{4}-\d{2}-\d{2})\b"
+    r"|\b(?P<dmy>\d{1,2})/(?P<month>\d{1,2})/(?P<year>\d{4})\b"
+    r"|\b(?P<relative>day after tomorrow|tomorrow|today|tonight)\b"
+    r"|\b(?P<next>next\s+)?(?P<weekday>" + "|".join(sorted(WEEKDAY_NAMES, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+_TIME = r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?"
+_RANGE_PATTERN = re.compile(r"\b" + _TIME + r"\s*(?:-|–|to|till|until)\s*" + _TIME + r"\b", re.IGNORECASE)
+_AT_PATTERN = re.compile(r"\b(?:at\s+)?" + _TIME + r"(?=\s|$|[,.!?])", re.IGNORECASE)
+_NOW_PATTERN = re.compile(r"\b(?:now|right now)\b", re.IGNORECASE)
+_COURSE_PATTERN = re.compile(r"\bfor\s+", re.IGNORECASE)
+# Words that lead into the date or time after a course name: "for AM 101 on friday", "for CH 103 this week at 9"
+_CONNECTORS = re.compile(r"(?:\s+(?:on|at|from|in|this|the|during|between))+$", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=8)
+def _room_pattern(room_ids):
+    # "SPS 7", "sps7" and "SPS-7" all name room "SPS 7"; longest ids first so "PB-GF1" beats "PB-GF"
+    parts = []
+    for room_id in sorted(room_ids, key=len, reverse=True):
+        tokens = re.findall(r"[A-Za-z]+|\d+", room_id)
+        if tokens:
+            parts.append(r"[\s-]*".join(re.escape(token) for token in tokens))
+    return re.compile(r"\b(" + "|".join(parts) + r")\b", re.IGNORECASE) if parts else None
+
+
+def _room_key(text):
+    return "".join(re.findall(r"[A-Za-z]+|\d+", text)).upper()
+
+
+def _hour(hour, minutes, meridiem, default_pm=True):
+    # Returns 0-23, or None for anything that isn't on the hour. Bare 1-7 means afternoon, as on the timetable.
+    if minutes not in (None, "00") or hour > 23:
+        return None
+    if meridiem:
+        if hour > 12:
+            return None
+        meridiem = meridiem.lower()
+        if meridiem == "pm" and hour < 12:
+            hour += 12
+        elif meridiem == "am" and hour == 12:
+            hour = 0
+    elif default_pm and 1 <= hour <= 7:
+        hour += 12
+    return hour
+
+
+def _slots_between(start, end):
+    return [f"{h:02d}:00-{h + 1:02d}:00" for h in range(start, end)]
+
+
+def _overlaps(span, taken):
+    return any(span[0] < end and start < span[1] for start, end in taken)
+
+
+def _parse_date(match, today):
+    if match.group("iso"):
+        return match.group("iso")
+    if match.group("dmy"):
+        try:
+            return datetime.date(int(match.group("year")), int(match.group("month")), int(match.group("dmy"))).isoformat()
+        except ValueError:
+            return None
+    relative = match.group("relative")
+    if relative:
+        relative = relative.lower()
+        days = 2 if relative == "day after tomorrow" else 1 if relative == "tomorrow" else 0
+        return (today + datetime.timedelta(days=days)).isoformat()
+    ahead = (WEEKDAY_NAMES[match.group("weekday").lower()] - today.weekday()) % 7
+    if match.group("next") and ahead == 0:
+        ahead = 7
+    return (today + datetime.timedelta(days=ahead)).isoformat()
+
+
+def parse_request(text, room_ids, today=None, now_hour=None, known_slots=None):
+    # Returns {"intent": "book"|"find", "date": "YYYY-MM-DD", "time_slots": [...], "room_id", "building",
+    # "course_name"} or None. room_ids is the engine's room list; a missing date means today. With
+    # known_slots (the engine's time slots), times outside them ("at 8pm") also give None.
+    today = today or datetime.date.today()
+    lowered = text.lower()
+    taken = []
+
+    room_id = None
+    building = None
+    pattern = _room_pattern(tuple(room_ids))
+    if pattern:
+        match = pattern.search(text)
+        if match:
+            # Exact spelling first: the timetable has both "SPS 5" and "SPS5"
+            typed = match.group(1)
+            room_id = next((r for r in room_ids if r.upper() == typed.upper()), None)
+            if room_id is None:
+                room_id = next((r for r in room_ids if _room_key(r) == _room_key(typed)), None)
+            taken.append(match.span())
+    if room_id is None:
+        # "in PB" / "in the SPS block": a building prefix shared by several rooms
+        prefixes = {re.split(r"[\s-]", r)[0].upper() for r in room_ids if re.search(r"[\s-]", r)}
+        for word in re.finditer(r"\b[A-Za-z]+\b", text):
+            if word.group(0).upper() in prefixes:
+                building = word.group(0).upper()
+                taken.append(word.span())
+                break
+
+    date_str = None
+    for match in _DATE_PATTERN.finditer(text):
+        if not _overlaps(match.span(), taken):
+            date_str = _parse_date(match, today)
+            if date_str is None:
+                return None
+            taken.append(match.span())
+            break
+
+    time_slots = None
+    for match in _RANGE_PATTERN.finditer(text):
+        if _overlaps(match.span(), taken):
+            continue
+        # "10-11am": the start shares the end's am/pm unless that would put it after the end ("11-1pm")
+        shared = match.group(6) if int(match.group(1)) <= int(match.group(4)) else None
+        start = _hour(int(match.group(1)), match.group(2), match.group(3) or shared)
+        end = _hour(int(match.group(4)), match.group(5), match.group(6))
+        if start is None or end is None:
+            return None
+        if end <= start and end < 12:
+            end += 12
+        if end <= start:
+            return None
+        time_slots = _slots_between(start, end)
+        taken.append(match.span())
+        break
+    if time_slots is None:
+        for match in _AT_PATTERN.finditer(text):
+            if _overlaps(match.span(), taken):
+                continue
+            if not match.group(3) and not match.group(0).lower().startswith("at") and not match.group(2):
+                continue  # A bare number ("AM 101", "room 7") is not a time
+            start = _hour(int(match.group(1)), match.group(2), match.group(3))
+            if start is None:
+                return None
+            time_slots = _slots_between(start, start + 1)
+            taken.append(match.span())
+            break
+    if time_slots is None and _NOW_PATTERN.search(text):
+        hour = now_hour if now_hour is not None else datetime.datetime.now().hour
+        time_slots = _slots_between(hour, hour + 1)
+    if not time_slots:
+        return None
+    if known_slots is not None and any(time_slot not in known_slots for time_slot in time_slots):
+        return None
+
+    intent = "book" if any(re.search(rf"\b{word}\b", lowered) for word in BOOK_WORDS) else "find"
+
+    course_name = None
+    match = _COURSE_PATTERN.search(text)
+    if match and not _overlaps(match.span(), taken):
+        end = min([start for start, _ in taken if start >= match.end()], default=len(text))
+        course_name = _CONNECTORS.sub("", " " + text[match.end():end].strip(" ,.")).strip(" ,.") or None
+    if intent == "book" and room_id is None:
+        return None
+
+    return {
+        "intent": intent,
+        "date": date_str or today.isoformat(),
+        "time_slots": time_slots,
+        "room_id": room_id,
+        "building": building,
+        "course_name": course_name,
+    }
@@ -0,0 +1,19 @@
+import importlib.util
+import os
+import sys
+
+# project(1).py can't be imported by name, so load it from its path once and re-export the engine classes
+# for the other front ends (app.py, scripts). It is registered in sys.modules so its objects can be pickled.
+_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "project(1).py")
+
+if "dtu_room_booking" in sys.modules:
+    dtu_room_booking = sys.modules["dtu_room_booking"]
+else:
+    _spec = importlib.util.spec_from_file_location("dtu_room_booking", _path)
+    dtu_room_booking = importlib.util.module_from_spec(_spec)
+    sys.modules["dtu_room_booking"] = dtu_room_booking
+    _spec.loader.exec_module(dtu_room_booking)
+
+DTURoomBookingSystem = dtu_room_booking.DTURoomBookingSystem
+Room = dtu_room_booking.Room
+Professor = dtu_room_booking.Professor
@@ -0,0 +1,85 @@
+import heapq
+
+# Local, deterministic ranking of free rooms. Lower score = better room.
+#   capacity fit  - wasted seats relative to the expected class size (rooms that are too small are dropped)
+#   branch        - 0 when the room belongs to the requester's branch, 1 otherwise
+#   fragmentation - how much booking this slot would split the room's free time that day
+DEFAULT_WEIGHTS = {"capacity": 1.0, "branch": 0.6, "fragmentation": 0.4}
+# Distance of an alternative from what was asked for: per slot moved, per day moved, and per unit of room score
+DISTANCE_WEIGHTS = {"slot": 1.0, "day": 1.5, "room": 1.0}
+
+# Professors are registered with short department codes, rooms with full branch names
+BRANCH_ALIASES = {
+    "CSE": "Computer Science & Engineering",
+    "ECE": "Electronics & Communication Engineering",
+    "EEE": "Electrical Engineering",
+    "EE": "Electrical Engineering",
+    "ME": "Mechanical Engineering",
+    "CE": "Civil Engineering",
+    "Physics": "Engineering Physics",
+}
+
+
+def canonical_branch(branch):
+    return BRANCH_ALIASES.get(branch, branch)
+
+
+def fragmentation_cost(busy_slots, slot_pos, n_slots):
+    # busy_slots is a bitmask of the room's booked slot positions that day. Filling a slot between two
+    # free slots splits a free run in two (cost 1); next to a booking or the edge of the day costs less.
+    if busy_slots is None or slot_pos is None:
+        return 0.0
+    left_free = slot_pos > 0 and not (busy_slots >> (slot_pos - 1)) & 1
+    right_free = slot_pos < n_slots - 1 and not (busy_slots >> (slot_pos + 1)) & 1
+    return (left_free + right_free) / 2.0
+
+
+def room_score(room, expected_size=None, branch=None, busy_slots=None, slot_pos=None, n_slots=9,
+               weights=DEFAULT_WEIGHTS):
+    # Returns None for rooms that cannot seat the class
+    capacity = room["capacity"]
+    if expected_size:
+        if capacity < expected_size:
+            return None
+        waste = (capacity - expected_size) / capacity
+    else:
+        waste = 0.0
+    branch_miss = 0.0
+    if branch:
+        branch_miss = 0.0 if canonical_branch(room["branch"]) == canonical_branch(branch) else 1.0
+    return (weights["capacity"] * waste
+            + weights["branch"] * branch_miss
+            + weights["fragmentation"] * fragmentation_cost(busy_slots, slot_pos, n_slots))
+
+
+def rank_rooms(candidates, expected_size=None, branch=None, day_busy=None, slot_pos=None, n_slots=9,
+               top_k=5, weights=DEFAULT_WEIGHTS):
+    # candidates: room dicts as returned by the availability queries ({"room_id", "branch", "capacity"})
+    # day_busy: {room_id: bitmask of booked slot positions on the requested date}
+    # Returns up to top_k (score, room) pairs, best first; ties keep the candidates' original order.
+    day_busy = day_busy or {}
+    branch = canonical_branch(branch) if branch else None
+    scored = []
+    for order, room in enumerate(candidates):
+        score = room_score(room, expected_size, branch, day_busy.get(room["room_id"], 0), slot_pos, n_slots, weights)
+        if score is not None:
+            scored.append((score, order, room))
+    best = heapq.nsmallest(top_k, scored) if top_k else sorted(scored)
+    return [(score, room) for score, order, room in best]
+
+
+def explain_choice(room, expected_size=None, branch=None):
+    parts = [f"{room['room_id']} seats {room['capacity']}"]
+    if expected_size:
+        parts[0] += f" for {expected_size} expected"
+    if branch and canonical_branch(room["branch"]) == canonical_branch(branch):
+        parts.append(f"is in the {room['branch']} block")
+    else:
+        parts.append(f"belongs to {room['branch']}")
+    return ", ".join(parts) + "."
+
+
+def alternative_distance(slot_shift, day_shift, room_cost=0.0, weights=DISTANCE_WEIGHTS):
+    # slot_shift/day_shift are how far the alternative is from the requested slot/date (absolute values).
+    # With room_cost=0 this is a lower bound for every room in that (date, slot), which lets searches stop early.
+    return weights["slot"] * slot_shift + weights["day"] * day_shift + weights["room"] * room_cost
@@ -0,0 +1,52 @@
+import csv
+import html
+import io
+import json
+
+# Streaming writers for the campus schedule grid (DTURoomBookingSystem.iter_schedule_grid).
+# Each format is a generator of text chunks, so a semester export is written row by row:
+#   with open("week.csv", "w", newline="", encoding="utf-8") as f:
+#       write_export(system.iter_schedule_grid("2025-08-04", "2025-08-10"), "csv", f)
+
+EXPORT_COLUMNS = ("date", "weekday", "time_slot", "room_id", "status", "course_name", "professor_id",
+                  "professor_name", "purpose")
+
+
+def csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()   # Header only, when there were no rows
+
+
+def jsonl_chunks(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n"
+
+
+def html_chunks(rows, title="Campus schedule"):
+    yield f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title></head><body>\n"
+    yield "<table>\n<tr>" + "".join(f"<th>{column}</th>" for column in EXPORT_COLUMNS) + "</tr>\n"
+    for row in rows:
+        yield f"<tr class=\"{row[4]}\">" + "".join(f"<td>{html.escape(str(value))}</td>" for value in row) + "</tr>\n"
+    yield "</table>\n</body></html>\n"
+
+
+FORMATS = {"csv": csv_chunks, "jsonl": jsonl_chunks, "html": html_chunks}
+
+
+def write_export(rows, fmt, out):
+    # Returns the number of chunks written; raises ValueError for an unknown format
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; use one of {', '.join(FORMATS)}.")
+    count = 0
+    for chunk in FORMATS[fmt](rows):
+        if chunk:
+            out.write(chunk)
+            count += 1
+    return count
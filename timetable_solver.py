@@ -0,0 +1,230 @@
+import bisect
+import concurrent.futures
+import os
+import random
+
+from room_ranking import canonical_branch, room_score
+
+# Weekly timetable allocation: place course sessions into (weekday, time slot, room) so that no room or
+# professor is double-booked, every room seats its class, and rooms of the session's own branch are
+# preferred (room_ranking.room_score is the cost of a placement).
+#   session:       {"session_id", "professor_id", "size", "branch", "candidates": [(weekday, time_slot), ...]}
+#   room:          {"room_id", "branch", "capacity"}
+#   room_busy:     {(weekday, time_slot): set of room_ids already taken for the period}
+#   professor_busy:{(weekday, time_slot): set of professor_ids already teaching then}
+# solve() is a greedy construction (most constrained session first, cheapest room) followed by local
+# search (ejecting a blocking session into another spot, then cost-lowering moves and room swaps).
+# solve_parallel() runs solve() per group in a process pool and merges the results with a serial pass.
+
+EMPTY = frozenset()
+# Below this many sessions starting worker processes costs more than it saves
+PARALLEL_MIN_SESSIONS = 400
+
+
+def _lowest(mask):
+    return (mask & -mask).bit_length() - 1
+
+
+class _Allocation:
+    # Rooms are indexed in capacity order and every (weekday, slot) keeps a bitmask of unusable rooms, so
+    # the cheapest free room for a session is the lowest set bit among its branch's rooms or among all rooms.
+    def __init__(self, sessions, rooms, room_busy, professor_busy):
+        self.sessions = {s["session_id"]: s for s in sessions}
+        self.rooms = sorted(rooms, key=lambda room: (room["capacity"], room["room_id"]))
+        self.capacities = [room["capacity"] for room in self.rooms]
+        positions = {room["room_id"]: i for i, room in enumerate(self.rooms)}
+        self.all_mask = (1 << len(self.rooms)) - 1
+        self.branch_masks = {}
+        for i, room in enumerate(self.rooms):
+            branch = canonical_branch(room["branch"])
+            self.branch_masks[branch] = self.branch_masks.get(branch, 0) | (1 << i)
+        self.blocked = {}   # key -> mask of rooms taken outside this allocation or by placed sessions
+        for key, room_ids in room_busy.items():
+            for room_id in room_ids:
+                if room_id in positions:
+                    self.blocked[key] = self.blocked.get(key, 0) | (1 << positions[room_id])
+        self.professor_busy = professor_busy
+        self.assigned = {}      # session_id -> (key, room index)
+        self.room_taken = {}    # (key, room index) -> session_id
+        self.professor_taken = {}   # (key, professor_id) -> session_id
+
+    def cost(self, session, room_index):
+        return room_score(self.rooms[room_index], session.get("size"), session.get("branch"))
+
+    def adequate_mask(self, session):
+        return self.all_mask & ~((1 << bisect.bisect_left(self.capacities, session.get("size") or 0)) - 1)
+
+    def free_mask(self, session, key, ignore=None):
+        # Rooms the session could take at key (0 when its professor is busy then)
+        professor_id = session["professor_id"]
+        if professor_id in self.professor_busy.get(key, EMPTY):
+            return 0
+        holder = self.professor_taken.get((key, professor_id))
+        if holder is not None and holder != ignore:
+            return 0
+        blocked = self.blocked.get(key, 0)
+        if ignore is not None and ignore in self.assigned and self.assigned[ignore][0] == key:
+            blocked &= ~(1 << self.assigned[ignore][1])
+        return self.adequate_mask(session) & ~blocked
+
+    def best(self, session, ignore=None):
+        # (cost, key, room index) of the cheapest spot, or None
+        branch_mask = self.branch_masks.get(canonical_branch(session.get("branch") or ""), 0)
+        best = None
+        for key in session["candidates"]:
+            free = self.free_mask(session, key, ignore)
+            if not free:
+                continue
+            for mask in (free & branch_mask, free):
+                if mask:
+                    room_index = _lowest(mask)
+                    option = (self.cost(session, room_index), key, room_index)
+                    if best is None or option < best:
+                        best = option
+        return best
+
+    def n_options(self, session):
+        return sum(self.free_mask(session, key).bit_count() for key in session["candidates"])
+
+    def fits(self, session, key, room_index):
+        return key in session["candidates"] and (self.free_mask(session, key) >> room_index) & 1
+
+    def place(self, session_id, key, room_index):
+        self.assigned[session_id] = (key, room_index)
+        self.room_taken[key, room_index] = session_id
+        self.professor_taken[key, self.sessions[session_id]["professor_id"]] = session_id
+        self.blocked[key] = self.blocked.get(key, 0) | (1 << room_index)
+
+    def remove(self, session_id):
+        key, room_index = self.assigned.pop(session_id)
+        del self.room_taken[key, room_index]
+        del self.professor_taken[key, self.sessions[session_id]["professor_id"]]
+        self.blocked[key] &= ~(1 << room_index)
+
+    def greedy(self, session_ids):
+        # Fewest options first, larger classes first among equals
+        order = sorted(session_ids, key=lambda sid: (self.n_options(self.sessions[sid]),
+                                                     -(self.sessions[sid].get("size") or 0), sid))
+        for session_id in order:
+            best = self.best(self.sessions[session_id])
+            if best is not None:
+                self.place(session_id, best[1], best[2])
+
+    def eject(self, session_id, rng):
+        # Place an unassigned session by moving one session of this allocation out of a spot it could use
+        session = self.sessions[session_id]
+        professor_id = session["professor_id"]
+        adequate = self.adequate_mask(session)
+        spots = []
+        for key in session["candidates"]:
+            if professor_id in self.professor_busy.get(key, EMPTY):
+                continue
+            blocker = self.professor_taken.get((key, professor_id))
+            if blocker is not None:
+                # The professor teaches another session then; move that one and reuse its room if big enough
+                room_index = self.assigned[blocker][1]
+                if (adequate >> room_index) & 1:
+                    spots.append((key, room_index, blocker))
+                continue
+            for (taken_key, room_index), holder in self.room_taken.items():
+                if taken_key == key and (adequate >> room_index) & 1:
+                    spots.append((key, room_index, holder))
+        rng.shuffle(spots)
+        for key, room_index, other_id in spots:
+            other_key, other_room = self.assigned[other_id]
+            self.remove(other_id)
+            self.place(session_id, key, room_index)
+            move = self.best(self.sessions[other_id])
+            if move is not None:
+                self.place(other_id, move[1], move[2])
+                return True
+            self.remove(session_id)
+            self.place(other_id, other_key, other_room)
+        return False
+
+    def improve(self):
+        # Move sessions to cheaper free spots, and swap rooms between sessions sharing a slot
+        improved = False
+        for session_id in list(self.assigned):
+            session = self.sessions[session_id]
+            key, room_index = self.assigned[session_id]
+            best = self.best(session, ignore=session_id)
+            if best is not None and best[0] < self.cost(session, room_index) - 1e-9:
+                self.remove(session_id)
+                self.place(session_id, best[1], best[2])
+                improved = True
+        by_key = {}
+        for session_id, (key, room_index) in self.assigned.items():
+            by_key.setdefault(key, []).append(session_id)
+        for key, session_ids in by_key.items():
+            for i, a in enumerate(session_ids):
+                for b in session_ids[i + 1:]:
+                    room_a, room_b = self.assigned[a][1], self.assigned[b][1]
+                    sa, sb = self.sessions[a], self.sessions[b]
+                    if self.capacities[room_b] < (sa.get("size") or 0) or self.capacities[room_a] < (sb.get("size") or 0):
+                        continue
+                    before = self.cost(sa, room_a) + self.cost(sb, room_b)
+                    after = self.cost(sa, room_b) + self.cost(sb, room_a)
+                    if after < before - 1e-9:
+                        self.remove(a)
+                        self.remove(b)
+                        self.place(a, key, room_b)
+                        self.place(b, key, room_a)
+                        improved = True
+        return improved
+
+    def result(self):
+        assignments = {
+            session_id: (key[0], key[1], self.rooms[room_index]["room_id"])
+            for session_id, (key, room_index) in self.assigned.items()
+        }
+        unassigned = sorted(session_id for session_id in self.sessions if session_id not in self.assigned)
+        return assignments, unassigned
+
+
+def solve(sessions, rooms, room_busy, professor_busy, initial=None, rounds=20, seed=0):
+    # Returns ({session_id: (weekday, time_slot, room_id)}, [unassigned session ids]).
+    # initial: a previous (possibly partial) assignment in the same format to start from; entries that
+    # no longer fit are dropped and re-placed.
+    allocation = _Allocation(sessions, rooms, room_busy, professor_busy)
+    room_positions = {room["room_id"]: i for i, room in enumerate(allocation.rooms)}
+    for session_id, (weekday, time_slot, room_id) in (initial or {}).items():
+        session = allocation.sessions.get(session_id)
+        room_index = room_positions.get(room_id)
+        if session is None or room_index is None:
+            continue
+        if allocation.fits(session, (weekday, time_slot), room_index):
+            allocation.place(session_id, (weekday, time_slot), room_index)
+    allocation.greedy([sid for sid in allocation.sessions if sid not in allocation.assigned])
+
+    rng = random.Random(seed)
+    for _ in range(rounds):
+        changed = False
+        for session_id in [sid for sid in allocation.sessions if sid not in allocation.assigned]:
+            changed |= allocation.eject(session_id, rng)
+        changed |= allocation.improve()
+        if not changed:
+            break
+    return allocation.result()
+
+
+def _solve_group(args):
+    return solve(*args)
+
+
+def solve_parallel(groups, rooms, room_busy, professor_busy, workers=None, seed=0):
+    # groups: lists of sessions that are solved independently (e.g. one per branch timetable).
+    # Groups share rooms and professors, so the per-group answers are merged in order and a final serial
+    # solve() repairs whatever collided, starting from the merged assignment.
+    jobs = [(group, rooms, room_busy, professor_busy, None, 20, seed) for group in groups if group]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1 and sum(len(job[0]) for job in jobs) >= PARALLEL_MIN_SESSIONS:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_solve_group, jobs))
+    else:
+        results = [_solve_group(job) for job in jobs]
+    merged = {}
+    for assignments, unassigned in results:
+        merged.update(assignments)
+    all_sessions = [session for group in groups for session in group]
+    return solve(all_sessions, rooms, room_busy, professor_busy, initial=merged, seed=seed)